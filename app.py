@@ -11,16 +11,21 @@ Then open: http://localhost:5000
 
 from __future__ import annotations
 
+import json
 import sys
 from pathlib import Path
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 
 # Add scripts directory to path
 ROOT = Path(__file__).resolve().parent
 sys.path.insert(0, str(ROOT / "scripts"))
 
-from rag_query import retrieve, compose_answer
+from rag_query import retrieve, compose_answer, warmup
+from rag_query_gemini import build_prompt, query_gemini_stream
+
+# Load the vector store and embedding model once at startup instead of on the first request
+warmup()
 
 app = Flask(__name__, static_folder='static', static_url_path='')
 CORS(app)
@@ -89,6 +94,57 @@ def query():
             'error': str(e)
         }), 500
 
+@app.route('/api/query_stream', methods=['POST'])
+def query_stream():
+    """
+    Stream a Gemini-generated answer as Server-Sent Events.
+    
+    Request JSON:
+        {
+            "question": "What is the expense ratio of JM Value Fund?"
+        }
+    
+    Response events (text/event-stream):
+        data: {"delta": "JM Value Fund Direct Plan Growth has an expense ratio"}
+        data: {"delta": " of 0.98%..."}
+        data: {"done": true, "source": "https://groww.in/mutual-funds/jm-basic-fund-direct-growth"}
+    """
+    data = request.get_json(silent=True)
+    
+    if not isinstance(data, dict) or 'question' not in data:
+        return jsonify({
+            'success': False,
+            'error': 'Missing question in request'
+        }), 400
+    
+    if not isinstance(data['question'], str):
+        return jsonify({
+            'success': False,
+            'error': 'Question must be a string'
+        }), 400
+    
+    question = data['question'].strip()
+    
+    if not question:
+        return jsonify({
+            'success': False,
+            'error': 'Question cannot be empty'
+        }), 400
+    
+    def stream_generator():
+        try:
+            hits = retrieve(question, top_k=5)
+            source_url = hits[0]['metadata'].get('url') if hits else None
+            
+            for delta in query_gemini_stream(build_prompt(question, hits)):
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            
+            yield f"data: {json.dumps({'done': True, 'source': source_url})}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(stream_generator(), mimetype='text/event-stream')
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -106,6 +162,7 @@ if __name__ == '__main__':
     print("="*80)
     print(f"\n📍 Server running on port: {port}")
     print("🔧 API endpoint: /api/query")
+    print("🔧 Streaming endpoint: /api/query_stream")
     print("\n✨ Visit the app in your browser\n")
     print("="*80)
     
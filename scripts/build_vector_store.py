@@ -11,14 +11,21 @@ Run:
 
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List
 
 import faiss  # type: ignore
+import orjson
+import torch
 from sentence_transformers import SentenceTransformer
 
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - optional columnar metadata
+    pa = None
+
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 SCHEMES_DIR = DATA_DIR / "schemes"
@@ -26,8 +33,16 @@ GUIDES_DIR = DATA_DIR / "guides"
 VECTOR_DIR = ROOT / "vector_store"
 INDEX_PATH = VECTOR_DIR / "faiss.index"
 DOCUMENTS_PATH = VECTOR_DIR / "documents.json"
+FEATHER_PATH = DOCUMENTS_PATH.with_suffix(".feather")
 
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ENCODE_BATCH_SIZE = 128
+
+# Exhaustive search is exact and cheap for small corpora; past this size switch
+# to a compressed OPQ+IVF+PQ index so queries scan far fewer bytes.
+IVF_PQ_MIN_CHUNKS = 10_000
+IVF_PQ_FACTORY = "OPQ32_64,IVF256_HNSW32,PQ32"
+DEFAULT_NPROBE = 16
 
 
 @dataclass
@@ -36,89 +51,93 @@ class Chunk:
     metadata: Dict[str, str]
 
 
-def load_scheme_chunks() -> Iterable[Chunk]:
-    for path in SCHEMES_DIR.glob("*.json"):
-        payload = json.loads(path.read_text(encoding="utf-8"))
-        scheme = payload["scheme_name"]
-        source_url = payload["source_url"]
+def load_scheme_chunks(payload: Dict) -> Iterable[Chunk]:
+    scheme = payload["scheme_name"]
+    source_url = payload["source_url"]
+
+    # Core metadata sentence
+    yield Chunk(
+        text=f"{scheme} is a {payload['metadata'].get('category')} scheme "
+        f"in the {payload['metadata'].get('sub_category')} category offered by "
+        f"{payload['metadata'].get('fund_house')}. Data source: {source_url}",
+        metadata={
+            "type": "scheme_overview",
+            "scheme": scheme,
+            "url": source_url,
+        },
+    )
+
+    attributes = payload.get("attributes", {})
+    for field, value in attributes.items():
+        if isinstance(value, dict):
+            display = value.get("display") or value.get("value")
+            description = value.get("value") if isinstance(value.get("value"), str) else display
+        else:
+            description = value
+
+        if description is None:
+            continue
+
+        pretty_field = field.replace("_", " ").title()
+        sentence = f"{scheme} - {pretty_field}: {description}."
+
+        if isinstance(value, dict):
+            sentence += f" Source: {value.get('source_url', source_url)}"
+            chunk_url = value.get("source_url", source_url)
+        else:
+            sentence += f" Source: {source_url}"
+            chunk_url = source_url
 
-        # Core metadata sentence
         yield Chunk(
-            text=f"{scheme} is a {payload['metadata'].get('category')} scheme "
-            f"in the {payload['metadata'].get('sub_category')} category offered by "
-            f"{payload['metadata'].get('fund_house')}. Data source: {source_url}",
+            text=sentence,
             metadata={
-                "type": "scheme_overview",
+                "type": "scheme_attribute",
+                "field": field,
                 "scheme": scheme,
+                "url": chunk_url,
+            },
+        )
+
+    for doc in payload.get("documents", []):
+        yield Chunk(
+            text=f"{scheme} has a {doc.get('type')} document at {doc.get('url')}.",
+            metadata={
+                "type": "scheme_document",
+                "scheme": scheme,
+                "url": doc.get("url", source_url),
+            },
+        )
+
+
+def load_guide_chunks(payload: Dict) -> Iterable[Chunk]:
+    source_url = payload["source_url"]
+    guide_key = payload["guide_key"]
+
+    for method in payload.get("methods", []):
+        steps = " ".join(method.get("steps", []))
+        yield Chunk(
+            text=f"{method['label']}: {steps} Source: {source_url}",
+            metadata={
+                "type": "guide",
+                "guide_key": guide_key,
+                "label": method["label"],
                 "url": source_url,
             },
         )
 
-    #
-        attributes = payload.get("attributes", {})
-        for field, value in attributes.items():
-            if isinstance(value, dict):
-                display = value.get("display") or value.get("value")
-                description = value.get("value") if isinstance(value.get("value"), str) else display
-            else:
-                description = value
-
-            if description is None:
-                continue
-
-            pretty_field = field.replace("_", " ").title()
-            sentence = f"{scheme} - {pretty_field}: {description}."
-
-            if isinstance(value, dict):
-                sentence += f" Source: {value.get('source_url', source_url)}"
-                chunk_url = value.get("source_url", source_url)
-            else:
-                sentence += f" Source: {source_url}"
-                chunk_url = source_url
-
-            yield Chunk(
-                text=sentence,
-                metadata={
-                    "type": "scheme_attribute",
-                    "field": field,
-                    "scheme": scheme,
-                    "url": chunk_url,
-                },
-            )
-
-        for doc in payload.get("documents", []):
-            yield Chunk(
-                text=f"{scheme} has a {doc.get('type')} document at {doc.get('url')}.",
-                metadata={
-                    "type": "scheme_document",
-                    "scheme": scheme,
-                    "url": doc.get("url", source_url),
-                },
-            )
-
-
-def load_guide_chunks() -> Iterable[Chunk]:
-    for path in GUIDES_DIR.glob("*.json"):
-        payload = json.loads(path.read_text(encoding="utf-8"))
-        source_url = payload["source_url"]
-        guide_key = payload["guide_key"]
-
-        for method in payload.get("methods", []):
-            steps = " ".join(method.get("steps", []))
-            yield Chunk(
-                text=f"{method['label']}: {steps} Source: {source_url}",
-                metadata={
-                    "type": "guide",
-                    "guide_key": guide_key,
-                    "label": method["label"],
-                    "url": source_url,
-                },
-            )
+
+def _chunks_from_file(path: Path) -> List[Chunk]:
+    payload = orjson.loads(path.read_bytes())
+    if path.parent == GUIDES_DIR:
+        return list(load_guide_chunks(payload))
+    return list(load_scheme_chunks(payload))
 
 
 def collect_chunks() -> List[Chunk]:
-    chunks = list(load_scheme_chunks())
-    chunks.extend(load_guide_chunks())
+    paths = sorted(SCHEMES_DIR.glob("*.json")) + sorted(GUIDES_DIR.glob("*.json"))
+    chunks: List[Chunk] = []
+    for path in paths:
+        chunks.extend(_chunks_from_file(path))
     if not chunks:
         raise RuntimeError("No chunks generated – ensure data/schemes and data/guides exist.")
     return chunks
@@ -127,18 +146,49 @@ def collect_chunks() -> List[Chunk]:
 def build_index(chunks: List[Chunk]) -> None:
     VECTOR_DIR.mkdir(parents=True, exist_ok=True)
 
-    model = SentenceTransformer(EMBED_MODEL)
-    embeddings = model.encode([chunk.text for chunk in chunks], show_progress_bar=True)
+    on_gpu = torch.cuda.is_available()
+    # device=None lets sentence-transformers pick MPS on Apple silicon, else CPU.
+    model = SentenceTransformer(EMBED_MODEL, device="cuda" if on_gpu else None)
+    # MiniLM is trained for cosine similarity: unit-normalize so inner product == cosine.
+    # encode() length-sorts its inputs before batching, so large batches add little padding.
+    embeddings = model.encode(
+        [chunk.text for chunk in chunks],
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_tensor=on_gpu,
+        normalize_embeddings=True,
+        show_progress_bar=True,
+    )
+    if on_gpu:
+        # Keep every batch on the device and copy back to host once.
+        embeddings = embeddings.cpu().numpy()
 
     dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings.astype("float32"))
+    vectors = embeddings.astype("float32", copy=False)
+    if len(chunks) < IVF_PQ_MIN_CHUNKS:
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        index = faiss.index_factory(dimension, IVF_PQ_FACTORY, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        faiss.extract_index_ivf(index).nprobe = DEFAULT_NPROBE
+    index.add(vectors)
     faiss.write_index(index, str(INDEX_PATH))
 
     documents_payload = [
         {"text": chunk.text, "metadata": chunk.metadata} for chunk in chunks
     ]
-    DOCUMENTS_PATH.write_text(json.dumps(documents_payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    DOCUMENTS_PATH.write_bytes(orjson.dumps(documents_payload, option=orjson.OPT_INDENT_2))
+
+    if pa is not None:
+        table = pa.table(
+            {
+                "text": [chunk.text for chunk in chunks],
+                "metadata": [orjson.dumps(chunk.metadata).decode() for chunk in chunks],
+            }
+        )
+        # Uncompressed so rag_query.py can memory-map the columns directly.
+        feather.write_feather(table, str(FEATHER_PATH), compression="uncompressed")
+    elif FEATHER_PATH.exists():
+        FEATHER_PATH.unlink()  # would no longer match the rebuilt index
     print(f"Wrote {len(chunks)} chunks -> {INDEX_PATH} and {DOCUMENTS_PATH}")
 
 
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Export the MiniLM embedding model to ONNX and quantize it to INT8.
+
+rag_query.py picks up vector_store/minilm-int8.onnx automatically and runs
+query encoding through ONNX Runtime instead of PyTorch.
+
+Requirements:
+    - `py -3 -m pip install "optimum[onnxruntime]"`
+
+Run:
+    py -3 scripts/export_onnx.py
+"""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+ROOT = Path(__file__).resolve().parents[1]
+VECTOR_DIR = ROOT / "vector_store"
+ONNX_MODEL_PATH = VECTOR_DIR / "minilm-int8.onnx"
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def export_quantized_model() -> None:
+    model = ORTModelForFeatureExtraction.from_pretrained(EMBED_MODEL, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        quantizer.quantize(save_dir=tmp_dir, quantization_config=qconfig)
+        VECTOR_DIR.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Path(tmp_dir) / "model_quantized.onnx", ONNX_MODEL_PATH)
+    print(f"Wrote quantized encoder -> {ONNX_MODEL_PATH}")
+
+
+def main() -> None:
+    export_quantized_model()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,50 +13,353 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+# One knob sizes both the FAISS/OpenMP and torch intra-op pools, defaulting to an
+# operator-set OMP_NUM_THREADS. OpenMP reads its pool size when faiss/torch are
+# first imported, so set it up front.
+FAISS_NUM_THREADS = int(
+    os.getenv("FAISS_NUM_THREADS") or os.getenv("OMP_NUM_THREADS") or os.cpu_count() or 4
+)
+os.environ.setdefault("OMP_NUM_THREADS", str(FAISS_NUM_THREADS))
 
 import faiss  # type: ignore
+import numpy as np
+import orjson
+import torch
 from sentence_transformers import SentenceTransformer
 
+try:
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - optional columnar metadata
+    feather = None
+
+faiss.omp_set_num_threads(FAISS_NUM_THREADS)
+
 ROOT = Path(__file__).resolve().parents[1]
 VECTOR_DIR = ROOT / "vector_store"
 INDEX_PATH = VECTOR_DIR / "faiss.index"
 DOCUMENTS_PATH = VECTOR_DIR / "documents.json"
+FEATHER_PATH = DOCUMENTS_PATH.with_suffix(".feather")
+ONNX_MODEL_PATH = VECTOR_DIR / "minilm-int8.onnx"  # written by export_onnx.py
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256  # matches sentence-transformers' setting for all-MiniLM-L6-v2
+# Number of IVF lists probed per query (only used by IVF indexes).
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+# Paraphrased questions whose embeddings are at least this cosine-similar reuse
+# the earlier hits. Kept high so different schemes are never conflated.
+QUERY_CACHE_THRESHOLD = float(os.getenv("QUERY_CACHE_THRESHOLD", "0.95"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "10000"))
+# Concurrent queries arriving within this window share one encode and index search.
+ENCODE_MAX_BATCH = int(os.getenv("ENCODE_MAX_BATCH", "32"))
+ENCODE_BATCH_WAIT_MS = float(os.getenv("ENCODE_BATCH_WAIT_MS", "20"))
+# Upper bound on how long a request waits for the batcher before failing.
+RETRIEVE_TIMEOUT_S = float(os.getenv("RETRIEVE_TIMEOUT_S", "30"))
+# Compile the PyTorch encoder at server warmup (set TORCH_COMPILE=0 to disable).
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "1") == "1"
 
+# Loaded once per process and shared by every request (see load_index/load_model).
+_LOCK = threading.Lock()
+_INDEX = None
+_METADATA: List[Dict] | _FeatherDocuments | None = None
+_MODEL: SentenceTransformer | _OnnxEncoder | None = None
+_BATCHER: _RetrievalBatcher | None = None
 
-def load_index():
-    if not INDEX_PATH.exists() or not DOCUMENTS_PATH.exists():
-        raise FileNotFoundError(
-            "Vector store missing. Run `py -3 scripts\\build_vector_store.py` first."
+
+class _QueryCache:
+    """LRU cache of retrieval hits keyed by normalized query embedding."""
+
+    def __init__(self, threshold: float, max_entries: int) -> None:
+        self._threshold = threshold
+        self._max_entries = max_entries
+        self._index = None
+        self._entries: OrderedDict[int, Tuple[int, List[Dict]]] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, query_vec: np.ndarray, top_k: int) -> List[Dict] | None:
+        with self._lock:
+            if not self._entries:
+                return None
+            scores, ids = self._index.search(query_vec, 1)
+            entry_id = int(ids[0][0])
+            if entry_id == -1 or scores[0][0] < self._threshold:
+                return None
+            cached_k, hits = self._entries[entry_id]
+            if cached_k < top_k:
+                # Too few hits cached for this request; drop it so put() replaces it.
+                self._remove(entry_id)
+                return None
+            self._entries.move_to_end(entry_id)
+            return hits[:top_k]
+
+    def put(self, query_vec: np.ndarray, top_k: int, hits: List[Dict]) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            if self._index is None:
+                self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(query_vec.shape[1]))
+            if len(self._entries) >= self._max_entries:
+                self._remove(next(iter(self._entries)))
+            self._index.add_with_ids(query_vec, np.array([self._next_id], dtype="int64"))
+            self._entries[self._next_id] = (top_k, hits)
+            self._next_id += 1
+
+    def _remove(self, entry_id: int) -> None:
+        del self._entries[entry_id]
+        self._index.remove_ids(np.array([entry_id], dtype="int64"))
+
+
+_QUERY_CACHE = _QueryCache(QUERY_CACHE_THRESHOLD, QUERY_CACHE_SIZE)
+
+
+class _RetrievalBatcher:
+    """Background thread that coalesces concurrent queries into one encode() and search() call."""
+
+    def __init__(self, max_batch: int, wait_s: float) -> None:
+        self._max_batch = max_batch
+        self._wait_s = wait_s
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._queue: queue.Queue[Tuple[str, int, Future]] | None = None
+
+    def retrieve(self, query: str, top_k: int) -> List[Dict]:
+        future: Future = Future()
+        self._ensure_running().put((query, top_k, future))
+        return future.result(timeout=RETRIEVE_TIMEOUT_S)
+
+    def _ensure_running(self) -> queue.Queue[Tuple[str, int, Future]]:
+        # Threads do not survive fork (e.g. gunicorn --preload), so start the worker
+        # lazily in whichever process is actually serving requests.
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._queue = queue.Queue()
+                    threading.Thread(
+                        target=self._run, args=(self._queue,), name="retrieval-batcher", daemon=True
+                    ).start()
+                    self._pid = pid
+        return self._queue
+
+    def _run(self, requests: queue.Queue[Tuple[str, int, Future]]) -> None:
+        while True:
+            batch = [requests.get()]
+            deadline = time.monotonic() + self._wait_s
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(requests.get(timeout=max(remaining, 0)))
+                except queue.Empty:
+                    break
+
+            try:
+                query_vecs = encode_queries([query for query, _, _ in batch])
+                results = _search(query_vecs, [top_k for _, top_k, _ in batch])
+            except Exception:
+                # Don't let one bad query fail the whole batch: retry each on its own.
+                for query, top_k, future in batch:
+                    try:
+                        future.set_result(_search(encode_queries([query]), [top_k])[0])
+                    except Exception as exc:
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), hits in zip(batch, results):
+                future.set_result(hits)
+
+
+class _OnnxEncoder:
+    """INT8 ONNX Runtime port of MiniLM with sentence-transformers' mean pooling."""
+
+    def __init__(self, model_path: Path) -> None:
+        import onnxruntime  # type: ignore
+        from transformers import AutoTokenizer
+
+        self._session = onnxruntime.InferenceSession(
+            str(model_path), providers=["CPUExecutionProvider"]
         )
-    index = faiss.read_index(str(INDEX_PATH))
-    metadata = json.loads(DOCUMENTS_PATH.read_text(encoding="utf-8"))
-    return index, metadata
+        self._input_names = [node.name for node in self._session.get_inputs()]
+        # last_hidden_state is (batch, tokens, hidden); hidden is fixed by the export.
+        self._dimension = self._session.get_outputs()[0].shape[-1]
+        self._tokenizer = AutoTokenizer.from_pretrained(EMBED_MODEL)
 
+    def encode(
+        self, sentences: List[str], batch_size: int = 32, normalize_embeddings: bool = False
+    ) -> np.ndarray:
+        if not sentences:
+            return np.empty((0, self._dimension), dtype="float32")
+        batches = [
+            self._encode_batch(sentences[start : start + batch_size], normalize_embeddings)
+            for start in range(0, len(sentences), batch_size)
+        ]
+        return np.concatenate(batches)
 
-def retrieve(query: str, top_k: int = 5) -> List[Dict]:
-    index, metadata = load_index()
-    model = SentenceTransformer(EMBED_MODEL)
-    query_vec = model.encode([query])
-
-    distances, indices = index.search(query_vec.astype("float32"), top_k)
-    hits = []
-    for rank, idx in enumerate(indices[0]):
-        if idx == -1:
-            continue
-        doc = metadata[idx]
-        hits.append(
-            {
-                "rank": rank + 1,
-                "distance": float(distances[0][rank]),
-                "text": doc["text"],
-                "metadata": doc["metadata"],
-            }
+    def _encode_batch(self, sentences: List[str], normalize: bool) -> np.ndarray:
+        tokens = self._tokenizer(
+            sentences,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np",
         )
-    return hits
+        feeds = {name: tokens[name].astype("int64") for name in self._input_names}
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+
+class _FeatherDocuments:
+    """Memory-mapped documents.feather; metadata JSON is decoded only for returned hits."""
+
+    def __init__(self, path: Path) -> None:
+        table = feather.read_table(str(path), memory_map=True)
+        self._texts = table.column("text")
+        self._metadata = table.column("metadata")
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, idx: int) -> Dict:
+        idx = int(idx)
+        return {
+            "text": self._texts[idx].as_py(),
+            "metadata": orjson.loads(self._metadata[idx].as_py()),
+        }
+
+
+def _load_documents(ntotal: int) -> List[Dict] | _FeatherDocuments:
+    """Use documents.feather only if it matches the index; otherwise documents.json."""
+    # The feather file is a local, untracked build artifact, so a pulled index and
+    # documents.json can be newer than it.
+    if (
+        feather is not None
+        and FEATHER_PATH.exists()
+        and FEATHER_PATH.stat().st_mtime >= DOCUMENTS_PATH.stat().st_mtime
+    ):
+        documents = _FeatherDocuments(FEATHER_PATH)
+        if len(documents) == ntotal:
+            return documents
+    return orjson.loads(DOCUMENTS_PATH.read_bytes())
+
+
+def load_index():
+    global _INDEX, _METADATA
+    if _INDEX is None:
+        with _LOCK:
+            if _INDEX is None:
+                if not INDEX_PATH.exists() or not DOCUMENTS_PATH.exists():
+                    raise FileNotFoundError(
+                        "Vector store missing. Run `py -3 scripts\\build_vector_store.py` first."
+                    )
+                # Memory-map the index so workers share one copy through the OS page
+                # cache instead of each holding it in RSS. Keep vector_store/ on a local disk.
+                index = faiss.read_index(
+                    str(INDEX_PATH), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                )
+                if faiss.try_extract_index_ivf(index) is not None:
+                    faiss.ParameterSpace().set_index_parameter(index, "nprobe", FAISS_NPROBE)
+                _METADATA = _load_documents(index.ntotal)
+                _INDEX = index
+    return _INDEX, _METADATA
+
+
+def load_model() -> SentenceTransformer | _OnnxEncoder:
+    """Prefer the quantized ONNX export when present, else the PyTorch model."""
+    global _MODEL
+    if _MODEL is None:
+        with _LOCK:
+            if _MODEL is None:
+                if ONNX_MODEL_PATH.exists():
+                    _MODEL = _OnnxEncoder(ONNX_MODEL_PATH)
+                else:
+                    _MODEL = SentenceTransformer(EMBED_MODEL)
+    return _MODEL
+
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    return load_model().encode(
+        queries, batch_size=ENCODE_MAX_BATCH, normalize_embeddings=True
+    ).astype("float32", copy=False)
+
+
+def _compile_model(model: SentenceTransformer) -> None:
+    """Swap in a torch.compile'd transformer, keeping eager mode if compilation fails."""
+    transformer = model[0]
+    eager = transformer.auto_model
+    transformer.auto_model = torch.compile(eager, mode="reduce-overhead", dynamic=True)
+    try:
+        model.encode(["warmup"])  # compilation happens on the first forward pass
+    except Exception as exc:
+        print(f"torch.compile failed, using the eager model: {exc}")
+        transformer.auto_model = eager
+
+
+def warmup() -> None:
+    """Load the index and embedding model up front and enable batching of concurrent queries."""
+    global _BATCHER
+    torch.set_num_threads(FAISS_NUM_THREADS)
+    load_index()
+    model = load_model()
+    # torch.__version__ is a TorchVersion, so this is a proper version comparison.
+    if TORCH_COMPILE and isinstance(model, SentenceTransformer) and torch.__version__ >= "2.1":
+        _compile_model(model)
+    encode_queries(["warmup"])
+    if _BATCHER is None:
+        _BATCHER = _RetrievalBatcher(ENCODE_MAX_BATCH, ENCODE_BATCH_WAIT_MS / 1000)
+
+
+def _search(query_vecs: np.ndarray, top_ks: List[int]) -> List[List[Dict]]:
+    """Answer each query from the cache or, for all misses at once, from the index."""
+    index, metadata = load_index()
+    results: List[List[Dict] | None] = [
+        _QUERY_CACHE.get(query_vecs[i : i + 1], top_k) for i, top_k in enumerate(top_ks)
+    ]
+    misses = [i for i, hits in enumerate(results) if hits is None]
+    if not misses:
+        return results
+
+    scores, indices = index.search(query_vecs[misses], max(top_ks[i] for i in misses))
+    # Indexes built before the switch to inner product still return squared L2
+    # distances (lower is better); label them accordingly until rebuilt.
+    score_key = "distance" if index.metric_type == faiss.METRIC_L2 else "score"
+    for row, i in enumerate(misses):
+        hits = []
+        for rank, idx in enumerate(indices[row][: top_ks[i]]):
+            if idx == -1:
+                continue
+            doc = metadata[idx]
+            hits.append(
+                {
+                    "rank": rank + 1,
+                    score_key: float(scores[row][rank]),
+                    "text": doc["text"],
+                    "metadata": doc["metadata"],
+                }
+            )
+        _QUERY_CACHE.put(query_vecs[i : i + 1], top_ks[i], hits)
+        results[i] = hits
+    return results
+
+
+def retrieve_batch(queries: List[str], top_k: int = 5) -> List[List[Dict]]:
+    return _search(encode_queries(queries), [top_k] * len(queries))
+
+
+def retrieve(query: str, top_k: int = 5) -> List[Dict]:
+    if _BATCHER is not None:
+        return _BATCHER.retrieve(query, top_k)
+    return retrieve_batch([query], top_k)[0]
 
 
 def compose_answer(question: str, hits: List[Dict]) -> str:
@@ -13,22 +13,21 @@ Usage:
 from __future__ import annotations
 
 import argparse
-import json
 import os
-from pathlib import Path
-from typing import Dict, List
+import threading
+from typing import Dict, Iterator, List
 
-import faiss  # type: ignore
 import google.generativeai as genai
-from sentence_transformers import SentenceTransformer
 
-ROOT = Path(__file__).resolve().parents[1]
-VECTOR_DIR = ROOT / "vector_store"
-INDEX_PATH = VECTOR_DIR / "faiss.index"
-DOCUMENTS_PATH = VECTOR_DIR / "documents.json"
-EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Shares the cached index and embedding model with the basic RAG helper.
+from rag_query import retrieve
+
 MODEL_NAME = "gemini-1.5-flash"
 
+# Configured once and reused so the client's connections stay open between queries.
+_MODEL_LOCK = threading.Lock()
+_MODEL_G: genai.GenerativeModel | None = None
+
 
 def ensure_api_key() -> str:
     api_key = os.getenv("GEMINI_API_KEY")
@@ -41,38 +40,6 @@ def ensure_api_key() -> str:
     return api_key
 
 
-def load_index():
-    if not INDEX_PATH.exists() or not DOCUMENTS_PATH.exists():
-        raise FileNotFoundError(
-            "Vector store missing. Run `py -3 scripts\\build_vector_store.py` first."
-        )
-    index = faiss.read_index(str(INDEX_PATH))
-    metadata = json.loads(DOCUMENTS_PATH.read_text(encoding="utf-8"))
-    return index, metadata
-
-
-def retrieve(query: str, top_k: int = 5) -> List[Dict]:
-    index, metadata = load_index()
-    model = SentenceTransformer(EMBED_MODEL)
-    query_vec = model.encode([query])
-
-    distances, indices = index.search(query_vec.astype("float32"), top_k)
-    hits = []
-    for rank, idx in enumerate(indices[0]):
-        if idx == -1:
-            continue
-        doc = metadata[idx]
-        hits.append(
-            {
-                "rank": rank + 1,
-                "distance": float(distances[0][rank]),
-                "text": doc["text"],
-                "metadata": doc["metadata"],
-            }
-        )
-    return hits
-
-
 def build_prompt(question: str, hits: List[Dict]) -> str:
     context_blocks = []
     for idx, hit in enumerate(hits, start=1):
@@ -101,12 +68,24 @@ def build_prompt(question: str, hits: List[Dict]) -> str:
     )
 
 
+def _get_model() -> genai.GenerativeModel:
+    global _MODEL_G
+    if _MODEL_G is None:
+        with _MODEL_LOCK:
+            if _MODEL_G is None:
+                genai.configure(api_key=ensure_api_key())
+                _MODEL_G = genai.GenerativeModel(MODEL_NAME)
+    return _MODEL_G
+
+
 def query_gemini(prompt: str) -> str:
-    ensure_api_key()
-    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-    model = genai.GenerativeModel(MODEL_NAME)
-    response = model.generate_content(prompt)
-    return response.text.strip()
+    return _get_model().generate_content(prompt).text.strip()
+
+
+def query_gemini_stream(prompt: str) -> Iterator[str]:
+    """Yield the answer text piece by piece as Gemini generates it."""
+    for chunk in _get_model().generate_content(prompt, stream=True):
+        yield chunk.text
 
 
 def main() -> None:
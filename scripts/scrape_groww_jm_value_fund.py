@@ -16,13 +16,13 @@ reliable citation.
 
 from __future__ import annotations
 
-import json
 import re
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List
 
+import orjson
 import requests
 from bs4 import BeautifulSoup
 
@@ -35,23 +35,35 @@ ROOT = Path(__file__).resolve().parents[1]
 SCHEME_OUTPUT = ROOT / "data" / "schemes" / "jm-value-fund-direct-plan-growth.json"
 CAPITAL_GAINS_OUTPUT = ROOT / "data" / "guides" / "capital-gains-statement-groww.json"
 
+_RISK_RE = re.compile(r"Risk is ([A-Za-z ]+)")
+# The scheme data lives in a single Next.js script tag; slicing it out of the raw
+# bytes avoids building a DOM for the whole page.
+_NEXT_DATA_RE = re.compile(rb'<script id="__NEXT_DATA__"[^>]*>(.+?)</script>', re.DOTALL)
+
+# Reused across fetches so repeated requests keep the TCP/TLS connection alive.
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+
 
 class ScrapeError(RuntimeError):
     """Raised when expected content is missing from the source page."""
 
 
-def fetch_html(url: str) -> BeautifulSoup:
-    """Download a page and return a BeautifulSoup DOM tree."""
-    resp = requests.get(url, timeout=30, headers={"User-Agent": "Mozilla/5.0"})
+def fetch_html(url: str) -> bytes:
+    """Download a page and return its raw HTML."""
+    resp = _SESSION.get(url, timeout=30)
     resp.raise_for_status()
-    return BeautifulSoup(resp.content, "html.parser")
+    return resp.content
 
 
-def load_scheme_blob(soup: BeautifulSoup) -> Dict[str, Any]:
-    script = soup.find("script", id="__NEXT_DATA__")
-    if script is None or not script.string:
+def load_scheme_blob(html: bytes) -> Dict[str, Any]:
+    match = _NEXT_DATA_RE.search(html)
+    if match is None:
         raise ScrapeError("Unable to locate Next.js data blob on scheme page")
-    payload = json.loads(script.string)
+    try:
+        payload = orjson.loads(match.group(1))
+    except orjson.JSONDecodeError as exc:
+        raise ScrapeError("Next.js data blob on scheme page is not valid JSON") from exc
     try:
         return payload["props"]["pageProps"]["mf"]
     except KeyError as exc:  # pragma: no cover - defensive
@@ -69,7 +81,7 @@ def normalize_money(value: int | float | None) -> Dict[str, Any]:
 
 def extract_risk_label(mf_data: Dict[str, Any]) -> str:
     meta_desc = mf_data.get("meta_desc") or ""
-    match = re.search(r"Risk is ([A-Za-z ]+)", meta_desc)
+    match = _RISK_RE.search(meta_desc)
     if match:
         return match.group(1).strip()
     nfo_risk = mf_data.get("nfo_risk")
@@ -104,8 +116,8 @@ def extract_lock_in(mf_data: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def build_scheme_payload(url: str) -> Dict[str, Any]:
-    soup = fetch_html(url)
-    mf_data = load_scheme_blob(soup)
+    html = fetch_html(url)
+    mf_data = load_scheme_blob(html)
     timestamp = datetime.now(timezone.utc).isoformat()
     payload = {
         "scheme_key": mf_data.get("search_id") or mf_data.get("scheme_code"),
@@ -209,7 +221,7 @@ def extract_guide_methods(soup: BeautifulSoup) -> List[GuideMethod]:
 
 
 def build_capital_gains_payload(url: str) -> Dict[str, Any]:
-    soup = fetch_html(url)
+    soup = BeautifulSoup(fetch_html(url), "html.parser")
     title_tag = soup.find("h1")
     title = clean_text(title_tag.get_text()) if title_tag else "Capital Gains Statement Guide"
     methods = extract_guide_methods(soup)
@@ -225,7 +237,7 @@ def build_capital_gains_payload(url: str) -> Dict[str, Any]:
 
 def write_json(path: Path, payload: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2) + b"\n")
 
 
 def main() -> None:
@@ -19,7 +19,10 @@ from typing import Dict, List
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT / "scripts"))
 
-from rag_query import retrieve, compose_answer
+import numpy as np
+
+from build_vector_store import SCHEMES_DIR, collect_chunks
+from rag_query import QUERY_CACHE_THRESHOLD, _QueryCache, encode_queries, retrieve, compose_answer
 
 # Test cases with expected answers covering all three schemes
 TEST_CASES = [
@@ -65,6 +68,20 @@ TEST_CASES = [
 ]
 
 
+# Questions that differ only in the fund name must never share cached hits.
+FUND_SWAPPED_QUESTIONS = [
+    [
+        "What is the expense ratio of JM Value Fund?",
+        "What is the expense ratio of JM Aggressive Hybrid Fund?",
+        "What is the expense ratio of JM Flexicap Fund?",
+    ],
+    [
+        "What is the exit load for JM Value Fund?",
+        "What is the exit load for JM Aggressive Hybrid Fund?",
+    ],
+]
+
+
 def check_keywords_in_text(text: str, keywords: List[str]) -> tuple[bool, List[str]]:
     """Check if all expected keywords are present in the text (case-insensitive)."""
     text_lower = text.lower()
@@ -126,6 +143,121 @@ def run_test_case(test_num: int, test_case: Dict) -> bool:
     return test_passed
 
 
+def run_chunk_coverage_test() -> bool:
+    """Check that every scheme contributes attribute chunks, not only its overview."""
+    print(f"\n{'='*80}")
+    print("Chunk Coverage: every scheme file yields attribute chunks")
+    print(f"{'='*80}")
+
+    chunks = collect_chunks()
+    scheme_files = list(SCHEMES_DIR.glob("*.json"))
+    overview_schemes = {
+        chunk.metadata["scheme"] for chunk in chunks if chunk.metadata["type"] == "scheme_overview"
+    }
+    attribute_schemes = {
+        chunk.metadata["scheme"] for chunk in chunks if chunk.metadata["type"] == "scheme_attribute"
+    }
+    missing_schemes = sorted(overview_schemes - attribute_schemes)
+
+    test_passed = len(chunks) > len(scheme_files) and not missing_schemes
+
+    print(f"\n  ✓ Chunks: {len(chunks)} from {len(scheme_files)} scheme files")
+    if missing_schemes:
+        print(f"    Schemes without attribute chunks: {missing_schemes}")
+
+    print(f"\n{'─'*80}")
+    if test_passed:
+        print(f"✅ TEST PASSED")
+    else:
+        print(f"❌ TEST FAILED")
+
+    return test_passed
+
+
+def unit_vector(*components: float) -> np.ndarray:
+    """Return a normalized (1, d) float32 query vector."""
+    vec = np.array([components], dtype="float32")
+    return vec / np.linalg.norm(vec)
+
+
+def run_query_cache_test() -> bool:
+    """Check the semantic cache's threshold, LRU eviction and top_k replacement."""
+    print(f"\n{'='*80}")
+    print("Query Cache: threshold, eviction and top_k replacement")
+    print(f"{'='*80}")
+
+    hits = [{"rank": rank} for rank in range(1, 4)]
+    a, b, c = unit_vector(1, 0, 0, 0), unit_vector(0, 1, 0, 0), unit_vector(0, 0, 1, 0)
+    near_a = unit_vector(1, 0.1, 0, 0)  # cosine ~0.995 with a
+    far_a = unit_vector(1, 1, 0, 0)  # cosine ~0.707 with a
+
+    cache = _QueryCache(threshold=0.9, max_entries=10)
+    cache.put(a, 3, hits)
+    threshold_ok = (
+        cache.get(near_a, 3) == hits
+        and cache.get(near_a, 2) == hits[:2]
+        and cache.get(far_a, 3) is None
+    )
+
+    cache = _QueryCache(threshold=0.9, max_entries=2)
+    cache.put(a, 3, hits)
+    cache.put(b, 3, hits)
+    cache.put(c, 3, hits)
+    eviction_ok = cache.get(a, 3) is None and cache.get(b, 3) == hits and cache.get(c, 3) == hits
+
+    cache = _QueryCache(threshold=0.9, max_entries=10)
+    cache.put(a, 1, hits[:1])
+    miss_on_larger_k = cache.get(a, 3) is None
+    cache.put(a, 3, hits)
+    replacement_ok = miss_on_larger_k and cache.get(a, 3) == hits and cache.get(a, 1) == hits[:1]
+
+    test_passed = threshold_ok and eviction_ok and replacement_ok
+
+    print(f"\n  ✓ Hit above / miss below threshold: {threshold_ok}")
+    print(f"  ✓ Oldest entry evicted at capacity: {eviction_ok}")
+    print(f"  ✓ Larger top_k replaces cached entry: {replacement_ok}")
+
+    print(f"\n{'─'*80}")
+    if test_passed:
+        print(f"✅ TEST PASSED")
+    else:
+        print(f"❌ TEST FAILED")
+
+    return test_passed
+
+
+def run_fund_name_cache_test() -> bool:
+    """Check that real fund-name-swapped questions miss each other's cache entries."""
+    print(f"\n{'='*80}")
+    print(f"Query Cache: fund-name-swapped questions miss (threshold {QUERY_CACHE_THRESHOLD})")
+    print(f"{'='*80}\n")
+
+    collisions = []
+    for group in FUND_SWAPPED_QUESTIONS:
+        query_vecs = encode_queries(group)
+        for i, cached_question in enumerate(group):
+            cache = _QueryCache(QUERY_CACHE_THRESHOLD, max_entries=10)
+            cache.put(query_vecs[i : i + 1], 3, [{"question": cached_question}])
+            for j in range(i + 1, len(group)):
+                similarity = float(query_vecs[i] @ query_vecs[j])
+                print(f"  {similarity:.3f}  {cached_question!r} vs {group[j]!r}")
+                if cache.get(query_vecs[j : j + 1], 3) is not None:
+                    collisions.append((cached_question, group[j]))
+
+    test_passed = not collisions
+
+    if collisions:
+        print(f"\n    Cache collisions: {collisions}")
+
+    print(f"\n{'─'*80}")
+    if test_passed:
+        print(f"✅ TEST PASSED")
+    else:
+        print(f"❌ TEST FAILED")
+
+    return test_passed
+
+
 def main() -> None:
     """Run all test cases and report results."""
     print("="*80)
@@ -138,6 +270,10 @@ def main() -> None:
         passed = run_test_case(idx, test_case)
         results.append((idx, test_case['question'], passed))
     
+    results.append((len(results) + 1, "Every scheme contributes attribute chunks", run_chunk_coverage_test()))
+    results.append((len(results) + 1, "Semantic query cache threshold, eviction and top_k", run_query_cache_test()))
+    results.append((len(results) + 1, "Fund-name-swapped questions miss the query cache", run_fund_name_cache_test()))
+    
     # Summary
     print(f"\n\n{'='*80}")
     print("TEST SUMMARY")